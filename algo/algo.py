@@ -6,6 +6,15 @@ from dataclasses import dataclass
 from enum import Enum
 
 
+def build_broken_mask(broken_seats, rows: int, cols: int) -> List[bytearray]:
+    """Row-major rows x cols grid of 0/1 flags; out-of-range seats are ignored."""
+    mask = [bytearray(cols) for _ in range(rows)]
+    for row, col in broken_seats:
+        if 0 <= row < rows and 0 <= col < cols:
+            mask[row][col] = 1
+    return mask
+
+
 class PaperSet(Enum):
     A = "A"
     B = "B"
@@ -65,6 +74,8 @@ class SeatingAlgorithm:
         # NEW: real enrollment numbers per batch.
         # Example: {1: ["BTCS24O1001", "BTCS24O1002"], 2: ["BTCD24O2001", ...]}
         batch_roll_numbers: Optional[Dict[int, List[str]]] = None,
+        # precomputed rows x cols broken-seat grid (see build_broken_mask)
+        broken_mask: Optional[List[bytearray]] = None,
     ):
         """
         rows, cols, num_batches: as before
@@ -81,6 +92,8 @@ class SeatingAlgorithm:
                      e.g. {1: "CSE", 2: "ECE"}
         batch_roll_numbers: OPTIONAL: if provided, these are the actual roll/enrollment numbers
                             used instead of auto-generated serials.
+        broken_mask: OPTIONAL rows x cols grid of truthy flags for broken seats; when given
+                     without broken_seats, the broken seat list is derived from it.
         """
         self.rows = rows
         self.cols = cols
@@ -90,8 +103,16 @@ class SeatingAlgorithm:
         self.blocks = math.ceil(cols / self.block_width)
         self.batch_by_column = batch_by_column
         self.enforce_no_adjacent_batches = enforce_no_adjacent_batches
-        # broken seats as a set for O(1) lookup
-        self.broken_seats = set(broken_seats) if broken_seats else set()
+        # broken seats as a set (for counts/validation) plus a grid the fill
+        # loops index directly instead of hashing a (row, col) tuple per seat
+        if broken_mask is not None and not broken_seats:
+            self.broken_mask = broken_mask
+            self.broken_seats = {
+                (r, c) for r, mask_row in enumerate(broken_mask) for c, flag in enumerate(mask_row) if flag
+            }
+        else:
+            self.broken_seats = set(broken_seats) if broken_seats else set()
+            self.broken_mask = build_broken_mask(self.broken_seats, rows, cols)
         # batch student counts - total students available per batch
         self.batch_student_counts = batch_student_counts or {}
         # batch colors - use provided or fall back to defaults
@@ -156,6 +177,7 @@ class SeatingAlgorithm:
     def generate_seating(self) -> List[List[Seat]]:
         """Generate seating arrangement with all constraints"""
         self.seating_plan = []
+        broken_mask = self.broken_mask
 
         # If using batch-by-column placement, construct roll pools per batch
         if self.batch_by_column:
@@ -259,7 +281,7 @@ class SeatingAlgorithm:
                 b = (col % self.num_batches) + 1
                 for row in range(self.rows):
                     # Check if this seat is broken
-                    if (row, col) in self.broken_seats:
+                    if broken_mask[row][col]:
                         seat = Seat(row=row, col=col, is_broken=True, color="#FF0000")  # Red for broken
                         self.seating_plan[row][col] = seat
                         continue
@@ -352,7 +374,7 @@ class SeatingAlgorithm:
                 current_row: List[Seat] = []
                 for col in range(self.cols):
                     # Check if this seat is broken
-                    if (row, col) in self.broken_seats:
+                    if broken_mask[row][col]:
                         seat = Seat(row=row, col=col, is_broken=True, color="#FF0000")  # Red for broken
                         current_row.append(seat)
                         continue
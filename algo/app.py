@@ -1,20 +1,51 @@
 import sys
 import os
+import io
 from datetime import datetime
 import time
-import io
+import re
 import json
+import queue
+import hashlib
+import threading
 import sqlite3
+import uuid
 from pathlib import Path
+from collections import OrderedDict
+from itertools import chain, groupby
+from operator import itemgetter
 from functools import wraps
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 
-from flask import Flask, jsonify, request, send_file, render_template_string, session, render_template
+from flask import Flask, g, Response, jsonify, request, send_file, render_template_string, session, render_template, stream_with_context
 from flask_cors import CORS
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from pdf_gen.pdf_generation import get_or_create_seating_pdf
 from pdf_gen.template_manager import template_manager
 
+# Faster JSON for the large responses (students, seat grids) when available
+try:
+    import orjson
+    def _json_bytes(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    def _json_bytes(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    _json_loads = json.loads
+
+# Optional gzip/brotli compression of JSON responses
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
 # Attendence generation module import 
 try:
     from attendence_gen.attend_gen import generate_attendance_pdf
@@ -38,6 +69,7 @@ verify_token = None
 get_user_by_token = None
 update_user_profile = None
 google_auth_handler = None
+auth_startup = None
 
 try:
     from auth_service import (
@@ -46,7 +78,8 @@ try:
         verify_token,
         get_user_by_token,
         update_user_profile,
-        google_auth_handler
+        google_auth_handler,
+        startup as auth_startup
     )
     print("✅ Auth service imported successfully")
 except ImportError as e:
@@ -57,7 +90,8 @@ except ImportError as e:
             verify_token,
             get_user_by_token,
             update_user_profile,
-            google_auth_handler
+            google_auth_handler,
+            startup as auth_startup
         )
         print("✅ Auth service imported successfully (from Backend package)")
     except ImportError as e2:
@@ -81,28 +115,189 @@ except ImportError:
 # --------------------------------------------------
 try:
     from student_parser import StudentDataParser
-    from algo import SeatingAlgorithm
+    from algo import SeatingAlgorithm, build_broken_mask
+    # parse_file/preview take everything per call, so one instance serves all requests
+    PARSER = StudentDataParser()
     print("✅ Student parser and algorithm modules loaded")
 except ImportError as e:
     print(f"⚠️  Warning: Could not import local modules: {e}")
     StudentDataParser = None
     SeatingAlgorithm = None
+    PARSER = None
 
 # --------------------------------------------------
 # App setup
 # --------------------------------------------------
+class OrjsonProvider(DefaultJSONProvider):
+    """Route jsonify() and request.get_json() through orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-prod')
+# Behind Apache (mod_xsendfile) or lighttpd, let the front server stream
+# generated PDFs from disk instead of a Python worker
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+# Reject oversized bodies before Werkzeug spools them to disk
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 64 * 1024 * 1024))
 CORS(app, supports_credentials=True, resources={r"/api/*": {"origins": "*"}})
 
+# Seat grids repeat the same labels and colours, so JSON compresses very well;
+# PDFs are already compressed and are left alone
+if Compress is not None:
+    app.config['COMPRESS_MIMETYPES'] = ['application/json']
+    app.config['COMPRESS_LEVEL'] = 4
+    Compress(app)
+
 BASE_DIR = Path(__file__).parent
 DB_PATH = BASE_DIR / "demo.db"
 
+# --------------------------------------------------
+# Upload preview cache
+# --------------------------------------------------
+# Parsed uploads wait as JSON files between /api/upload and
+# /api/commit-upload, so any worker process can commit a preview stored by
+# another; an abandoned preview is swept after 15 minutes
+PREVIEWS_DIR = BASE_DIR / "previews"
+PREVIEWS_DIR.mkdir(exist_ok=True)
+PREVIEW_TTL = 900
+# Preview files are written here while the upload response is serialised
+PREVIEW_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+def preview_path(batch_id, suffix=".json"):
+    # batch ids are uuid4 strings; anything else never names a file
+    return PREVIEWS_DIR / f"{uuid.UUID(str(batch_id))}{suffix}"
+
+# Time of the last sweep; uploads scan previews/ at most once per PREVIEW_TTL
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+def sweep_previews():
+    """Delete previews, claims and half-written temp files older than PREVIEW_TTL."""
+    global _last_sweep
+    now = time.time()
+    with _sweep_lock:
+        if now - _last_sweep < PREVIEW_TTL:
+            return
+        _last_sweep = now
+    stale = now - PREVIEW_TTL
+    for old in PREVIEWS_DIR.iterdir():
+        try:
+            if old.suffix in (".json", ".claim", ".tmp") and old.stat().st_mtime < stale:
+                old.unlink()
+        except OSError:
+            pass
+
+def save_preview(pr):
+    sweep_previews()
+    
+    path = preview_path(pr.batch_id)
+    tmp = preview_path(pr.batch_id, ".tmp")
+    try:
+        tmp.write_bytes(_json_bytes({
+            "batch_id": pr.batch_id,
+            "batch_name": pr.batch_name,
+            "mode": pr.mode,
+            "rows_total": pr.rows_total,
+            "rows_extracted": pr.rows_extracted,
+            "data": pr.data,
+        }))
+        os.replace(tmp, path)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def claim_preview(batch_id):
+    """Atomically take a stored preview; returns (claim_path, preview) or (None, None)."""
+    try:
+        path = preview_path(batch_id)
+        claimed = preview_path(batch_id, ".claim")
+        # rename is atomic, so of two concurrent commits only one gets the file
+        os.replace(path, claimed)
+    except (ValueError, OSError):
+        return None, None
+    if claimed.stat().st_mtime < time.time() - PREVIEW_TTL:
+        claimed.unlink(missing_ok=True)
+        return None, None
+    # The claim ages from now, so the sweep leaves it alone while the commit runs
+    os.utime(claimed)
+    return claimed, _json_loads(claimed.read_bytes())
+
 # --------------------------------------------------
 # DB bootstrap
 # --------------------------------------------------
+def get_conn():
+    """Open a connection to the demo DB with the per-connection PRAGMAs applied."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+# Idle connections kept open between requests so the schema and page cache
+# stay warm; borrowers beyond the pool size get a fresh connection.
+_pool = queue.Queue(maxsize=8)
+
+def acquire_conn(row_factory=None):
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = get_conn()
+    conn.row_factory = row_factory
+    return conn
+
+def release_conn(conn):
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+@contextmanager
+def borrow_conn(row_factory=None):
+    """Borrow a configured connection from the pool and hand it back afterwards."""
+    conn = acquire_conn(row_factory)
+    try:
+        yield conn
+    finally:
+        release_conn(conn)
+
+def get_db():
+    """The request's pooled connection, borrowed on first use and returned on teardown.
+
+    Code that can also run in background jobs keeps using borrow_conn().
+    """
+    if "_db" not in g:
+        g._db = acquire_conn()
+    return g._db
+
+@app.teardown_appcontext
+def return_db(exc):
+    conn = g.pop("_db", None)
+    if conn is not None:
+        release_conn(conn)
+
+# Bump whenever the DDL below changes; PRAGMA user_version records the
+# version a DB file was last brought up to, so startup can skip the DDL
+SCHEMA_VERSION = 1
+
 def ensure_demo_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_conn()
+    # journal_mode is persistent in the DB file, so setting it once is enough
+    conn.execute("PRAGMA journal_mode=WAL")
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    if version >= SCHEMA_VERSION:
+        conn.close()
+        print(f"✅ Database ready at: {DB_PATH}")
+        return
     cur = conn.cursor()
 
     # 1. Classroom Registry
@@ -152,57 +347,143 @@ def ensure_demo_db():
         )
     """)
 
+    # Indices for the batch GROUP BY and the per-upload / per-batch filters.
+    # students.id is the rowid, which every index already carries as its last
+    # column, so idx_students_batch_name also serves ORDER BY batch_name, id.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_students_batch_name ON students(batch_name)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_students_upload ON students(upload_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_students_batch_id ON students(batch_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_allocations_job ON allocations(job_id)")
+
+    cur.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
     conn.commit()
+    # Refresh planner statistics so the indices above are actually picked
+    cur.execute("ANALYZE")
     conn.close()
     print(f"✅ Database initialized at: {DB_PATH}")
 
 ensure_demo_db()
 
+if auth_startup is not None:
+    auth_startup()
+
+# --------------------------------------------------
+# SQL statements
+# --------------------------------------------------
+# Hot-path SQL lives here so every call passes the same text and each pooled
+# connection's statement cache reuses the prepared statement.
+_SQL_STUDENTS_MARK = (
+    "SELECT (SELECT MAX(id) FROM students), "
+    "(SELECT batch_id FROM uploads ORDER BY id DESC LIMIT 1)"
+)
+_SQL_BATCH_ROLLS = "SELECT batch_name, enrollment FROM students ORDER BY batch_name, id"
+_SQL_INSERT_UPLOAD = "INSERT INTO uploads (batch_id, batch_name) VALUES (?, ?)"
+# students_filter() only yields four WHERE variants, so these format into a
+# handful of fixed texts that stay in the statement cache
+_SQL_COUNT_STUDENTS = "SELECT COUNT(*) FROM students {where}"
+_SQL_SELECT_STUDENTS = "SELECT * FROM students {where}ORDER BY id DESC LIMIT 1000"
+
+# 180 rows x 5 columns stays under SQLite's default 999 bound-variable limit
+STUDENT_INSERT_CHUNK = 180
+_SQL_INSERT_STUDENT = "INSERT INTO students (upload_id, batch_id, batch_name, enrollment, name) VALUES (?, ?, ?, ?, ?)"
+_SQL_INSERT_STUDENT_CHUNK = (
+    "INSERT INTO students (upload_id, batch_id, batch_name, enrollment, name) VALUES "
+    + ",".join(["(?, ?, ?, ?, ?)"] * STUDENT_INSERT_CHUNK)
+)
+
 # --------------------------------------------------
 # Helpers
 # --------------------------------------------------
-def parse_int_dict(val):
-    if isinstance(val, dict): 
-        return {int(k): int(v) for k, v in val.items()}
-    if isinstance(val, str) and val:
-        try: 
-            return json.loads(val)
-        except: 
-            pass
+BROKEN_SEAT_RE = re.compile(r"(\d+)\s*-\s*(\d+)")
+
+def parse_broken_seats(val, rows, cols):
+    """Turn "row-col, row-col" (1-based) into in-bounds 0-based (row, col) tuples."""
+    if isinstance(val, list):
+        return [tuple(p) for p in val]
+    if not isinstance(val, str):
+        return []
+    seats = []
+    for r, c in BROKEN_SEAT_RE.findall(val):
+        r, c = int(r) - 1, int(c) - 1
+        if 0 <= r < rows and 0 <= c < cols:
+            seats.append((r, c))
+    return seats
+
+# "1:30, 2:45" style fallback for values that are not JSON objects
+KV_INT_RE = re.compile(r"(\d+)\s*:\s*(-?\d+)")
+KV_STR_RE = re.compile(r"(\d+)\s*:\s*([^,]+)")
+
+def _coerce_int_keys(pairs, cast):
+    """Single pass over (key, value) pairs into {int: cast(value)}."""
+    return {int(k): cast(v) for k, v in pairs}
+
+def _parse_kv_dict(val, kv_re, cast):
+    if not val:
+        return {}
+    if isinstance(val, str):
+        try:
+            val = _json_loads(val)
+        except json.JSONDecodeError:  # orjson's decode error subclasses this
+            return _coerce_int_keys(((k, v.strip()) for k, v in kv_re.findall(val)), cast)
+    if isinstance(val, dict):
+        return _coerce_int_keys(val.items(), cast)
     return {}
 
+def parse_int_dict(val):
+    return _parse_kv_dict(val, KV_INT_RE, int)
+
 def parse_str_dict(val):
-    if isinstance(val, dict): 
-        return {int(k): str(v) for k, v in val.items()}
-    if isinstance(val, str) and val:
-        try: 
-            return json.loads(val)
-        except: 
-            pass
-    return {}
+    return _parse_kv_dict(val, KV_STR_RE, str)
 
-def get_batch_counts_and_labels_from_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT batch_name, COUNT(*) FROM students GROUP BY batch_name ORDER BY batch_name")
-    rows = cur.fetchall()
-    conn.close()
-    counts, labels = {}, {}
-    for i, (name, count) in enumerate(rows, start=1):
-        counts[i] = count
-        labels[i] = name
-    return counts, labels
-
-def get_batch_roll_numbers_from_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT batch_name, enrollment FROM students ORDER BY id")
-    rows = cur.fetchall()
-    conn.close()
-    groups = {}
-    for batch, enr in rows:
-        groups.setdefault(batch, []).append(enr)
-    return {i + 1: groups[k] for i, k in enumerate(sorted(groups))}
+# The batch getters only change when students are committed or reset. Both
+# move the newest student id or the newest upload's uuid, so that pair is a
+# two-index-lookup fingerprint that also sees writes from other processes.
+_batch_cache = {"mark": None, "data": {}}
+_batch_cache_lock = threading.Lock()
+
+def students_mark():
+    with borrow_conn() as conn:
+        return conn.execute(_SQL_STUDENTS_MARK).fetchone()
+
+def cached_by_students_mark(fn):
+    @wraps(fn)
+    def wrapper(*args):
+        mark = students_mark()
+        key = (fn.__name__,) + args
+        with _batch_cache_lock:
+            if _batch_cache["mark"] != mark:
+                _batch_cache["mark"] = mark
+                _batch_cache["data"] = {}
+            hit = _batch_cache["data"].get(key)
+        if hit is not None:
+            return hit
+        result = fn(*args)
+        with _batch_cache_lock:
+            if _batch_cache["mark"] == mark:
+                _batch_cache["data"][key] = result
+        return result
+    return wrapper
+
+def insert_students(cur, rows):
+    """Insert 5-tuples using multi-row VALUES statements; the tail goes row by row."""
+    full = len(rows) - len(rows) % STUDENT_INSERT_CHUNK
+    for i in range(0, full, STUDENT_INSERT_CHUNK):
+        cur.execute(_SQL_INSERT_STUDENT_CHUNK, list(chain.from_iterable(rows[i:i + STUDENT_INSERT_CHUNK])))
+    if full < len(rows):
+        cur.executemany(_SQL_INSERT_STUDENT, rows[full:])
+
+@cached_by_students_mark
+def load_batches_from_db():
+    """Counts, labels and roll lists per batch number from a single ordered scan."""
+    counts, labels, rolls = {}, {}, {}
+    with borrow_conn() as conn:
+        cur = conn.execute(_SQL_BATCH_ROLLS)
+        for i, (name, grp) in enumerate(groupby(cur, key=itemgetter(0)), start=1):
+            enrs = [enr for _, enr in grp]
+            counts[i] = len(enrs)
+            labels[i] = name
+            rolls[i] = enrs
+    return counts, labels, rolls
 
 # --------------------------------------------------
 # Auth Decorator
@@ -235,21 +516,17 @@ def token_required(fn):
 # --------------------------------------------------
 @app.route("/api/classrooms", methods=["GET"])
 def get_classrooms():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db()
     conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM classrooms ORDER BY name ASC")
-    rooms = [dict(r) for r in cur.fetchall()]
-    conn.close()
+    rooms = [dict(r) for r in conn.execute("SELECT * FROM classrooms ORDER BY name ASC")]
     return jsonify(rooms)
 
 @app.route("/api/classrooms", methods=["POST"])
 def save_classroom():
     data = request.get_json()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
     try:
-        cur.execute("""
+        conn = get_db()
+        conn.execute("""
             INSERT OR REPLACE INTO classrooms (id, name, rows, cols, broken_seats, block_width)
             VALUES (?, ?, ?, ?, ?, ?)
         """, (data.get('id'), data['name'], data['rows'], data['cols'], 
@@ -258,21 +535,16 @@ def save_classroom():
         return jsonify({"success": True, "message": "Classroom saved"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 400
-    finally:
-        conn.close()
 
 @app.route("/api/classrooms/<int:room_id>", methods=["DELETE"])
 def delete_classroom(room_id):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
     try:
-        cur.execute("DELETE FROM classrooms WHERE id = ?", (room_id,))
+        conn = get_db()
+        conn.execute("DELETE FROM classrooms WHERE id = ?", (room_id,))
         conn.commit()
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
 
 
 # --------------------------------------------------
@@ -370,8 +642,46 @@ def logout_route():
 # --------------------------------------------------
 # Upload Routes
 # --------------------------------------------------
+PREVIEW_HEAD_BYTES = 256 * 1024
+EXCEL_MAGIC = (b"PK\x03\x04", b"\xD0\xCF\x11\xE0")
+
+def preview_upload(stream, max_rows):
+    """Preview a spooled upload, parsing only the head of large CSVs."""
+    head = stream.read(PREVIEW_HEAD_BYTES)
+    stream.seek(0)
+    # Excel is a zip/compound file and can't be cut short; small files are
+    # cheap enough to parse in place
+    if len(head) < PREVIEW_HEAD_BYTES or head.startswith(EXCEL_MAGIC):
+        return PARSER.preview(stream, max_rows=max_rows)
+    
+    preview = PARSER.preview(head[:head.rfind(b"\n") + 1], max_rows=max_rows)
+    # Row total from a newline count over the rest of the stream, so blank
+    # lines and quoted line breaks make it an estimate
+    lines, last = 0, b"\n"
+    for chunk in iter(lambda: stream.read(1 << 20), b""):
+        lines += chunk.count(b"\n")
+        last = chunk[-1:]
+    stream.seek(0)
+    preview["totalRows"] = lines - (last == b"\n")
+    preview["totalRowsEstimated"] = True
+    return preview
+
+def upload_too_large():
+    """413 response when the declared body size is over MAX_CONTENT_LENGTH.
+
+    Checked before touching request.files so the multipart parser never
+    runs, and so the routes' catch-all handlers can't turn it into a 500.
+    """
+    limit = app.config['MAX_CONTENT_LENGTH']
+    if limit and request.content_length and request.content_length > limit:
+        return file_too_large(None)
+    return None
+
 @app.route("/api/upload-preview", methods=["POST"])
 def api_upload_preview():
+    too_large = upload_too_large()
+    if too_large:
+        return too_large
     try:
         if "file" not in request.files: 
             return jsonify({"error": "No file provided"}), 400
@@ -383,9 +693,8 @@ def api_upload_preview():
         if StudentDataParser is None:
             return jsonify({"error": "Parser module not available"}), 500
         
-        file_content = file.read()
-        parser = StudentDataParser()
-        preview_data = parser.preview(io.BytesIO(file_content), max_rows=10)
+        file.stream.seek(0)
+        preview_data = preview_upload(file.stream, max_rows=10)
         
         return jsonify({"success": True, **preview_data}), 200
     except Exception as e:
@@ -393,6 +702,9 @@ def api_upload_preview():
 
 @app.route("/api/upload", methods=["POST"])
 def api_upload():
+    too_large = upload_too_large()
+    if too_large:
+        return too_large
     try:
         if "file" not in request.files: 
             return jsonify({"error": "No file"}), 400
@@ -406,24 +718,20 @@ def api_upload():
         name_col = request.form.get("nameColumn", None)
         enrollment_col = request.form.get("enrollmentColumn", None)
         
-        file_content = file.read()
-        parser = StudentDataParser()
-        pr = parser.parse_file(
-            io.BytesIO(file_content),
+        file.stream.seek(0)
+        pr = PARSER.parse_file(
+            file.stream,
             mode=mode, 
             batch_name=batch_name,
             name_col=name_col, 
             enrollment_col=enrollment_col
         )
         
-        if not hasattr(app, 'config'): 
-            app.config = {}
-        if 'UPLOAD_CACHE' not in app.config: 
-            app.config['UPLOAD_CACHE'] = {}
-        
-        app.config['UPLOAD_CACHE'][pr.batch_id] = pr
+        # Overlap the preview write with building and encoding the response;
+        # the write must still land before the client can commit
+        persisted = PREVIEW_EXECUTOR.submit(save_preview, pr)
         
-        return jsonify({
+        response = jsonify({
             "success": True,
             "batch_id": pr.batch_id,
             "batch_name": pr.batch_name,
@@ -434,7 +742,9 @@ def api_upload():
                 "totalRows": pr.rows_total,
                 "extractedRows": pr.rows_extracted
             }
-        }), 200
+        })
+        persisted.result()
+        return response, 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -443,43 +753,56 @@ def commit_upload():
     try:
         body = request.get_json(force=True)
         batch_id = body.get("batch_id")
-        cache = app.config.get("UPLOAD_CACHE", {})
-        pr = cache.get(batch_id)
+        # Claiming up front means two concurrent commits of one preview can't
+        # both proceed; a failed commit puts it back so the user can retry
+        claimed, pr = claim_preview(batch_id)
         
         if not pr: 
             return jsonify({"error": "Preview expired or not found"}), 400
         
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO uploads (batch_id, batch_name) VALUES (?, ?)", 
-            (pr.batch_id, pr.batch_name)
-        )
-        upload_id = cur.lastrowid
-        
-        inserted, skipped = 0, 0
-        for row in pr.data[pr.batch_name]:
-            enr = row.get("enrollmentNo") if isinstance(row, dict) else str(row)
-            name = row.get("name") if isinstance(row, dict) else None
+        try:
+            batch_id, batch_name = pr["batch_id"], pr["batch_name"]
+            # Mode 1 rows are bare enrollment strings, mode 2 rows are dicts
+            records = pr["data"][batch_name]
+            if pr["mode"] == 1:
+                candidates = [(str(row), None) for row in records]
+            else:
+                candidates = [(row.get("enrollmentNo"), row.get("name")) for row in records]
             
-            if not enr: 
-                skipped += 1
-                continue
+            conn = get_db()
+            cur = conn.cursor()
+            # Take the write lock up front: concurrent commits wait on the busy
+            # timeout here rather than hitting SQLITE_BUSY halfway through
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute(_SQL_INSERT_UPLOAD, (batch_id, batch_name))
+            upload_id = cur.lastrowid
             
+            # Duplicate enrollments are dropped here, first occurrence wins as
+            # OR IGNORE used to, so the plain INSERT below never conflicts
+            by_enr = {}
+            for enr, name in candidates:
+                if enr and enr not in by_enr:
+                    by_enr[enr] = (upload_id, batch_id, batch_name, enr, name)
+            rows = list(by_enr.values())
+            
+            # The whole roster lands in one transaction, so readers never see
+            # half an upload and a failure leaves nothing behind
             try:
-                cur.execute(
-                    "INSERT INTO students (upload_id, batch_id, batch_name, enrollment, name) VALUES (?, ?, ?, ?, ?)", 
-                    (upload_id, pr.batch_id, pr.batch_name, enr, name)
-                )
-                inserted += 1
-            except sqlite3.IntegrityError:
-                skipped += 1
-        
-        conn.commit()
-        conn.close()
+                insert_students(cur, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            inserted = len(rows)
+            skipped = len(candidates) - inserted
+        except Exception:
+            try:
+                os.replace(claimed, preview_path(batch_id))
+            except OSError:
+                claimed.unlink(missing_ok=True)
+            raise
         
-        if batch_id in app.config['UPLOAD_CACHE']: 
-            del app.config['UPLOAD_CACHE'][batch_id]
+        claimed.unlink(missing_ok=True)
         
         return jsonify({"success": True, "inserted": inserted, "skipped": skipped})
     except Exception as e:
@@ -488,62 +811,118 @@ def commit_upload():
 # --------------------------------------------------
 # Data Access
 # --------------------------------------------------
+def students_filter():
+    """WHERE clause and params for the optional ?batch_id= / ?upload_id= filters."""
+    clauses, params = [], []
+    for col in ("batch_id", "upload_id"):
+        val = request.args.get(col)
+        if val:
+            clauses.append(f"{col} = ?")
+            params.append(val)
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    return where, params
+
+@app.route("/api/students/count", methods=["GET"])
+def api_students_count():
+    where, params = students_filter()
+    conn = get_db()
+    (total,) = conn.execute(_SQL_COUNT_STUDENTS.format(where=where), params).fetchone()
+    return jsonify({"count": total})
+
 @app.route("/api/students", methods=["GET"])
 def api_students():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM students ORDER BY id DESC LIMIT 1000")
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-    return jsonify(rows)
+    # The attendance page asks for a single batch_id
+    where, params = students_filter()
+    sql = _SQL_SELECT_STUDENTS.format(where=where)
+    
+    # Stream the JSON array in fetchmany() chunks instead of building the
+    # full list of dicts before serialising it
+    def generate():
+        conn = get_db()
+        cur = conn.execute(sql, params)
+        cols = [d[0] for d in cur.description]
+        yield b"["
+        sep = b""
+        for chunk in iter(lambda: cur.fetchmany(256), []):
+            # Plain tuples zipped with the column names, one encode per
+            # chunk; strip the list brackets so chunks splice together
+            yield sep + _json_bytes([dict(zip(cols, r)) for r in chunk])[1:-1]
+            sep = b","
+        yield b"]"
+    
+    return Response(stream_with_context(generate()), mimetype="application/json")
 
 # --------------------------------------------------
 # Allocation Routes
 # --------------------------------------------------
-@app.route("/api/generate-seating", methods=["POST"])
-def generate_seating():
-    if SeatingAlgorithm is None:
-        return jsonify({"error": "SeatingAlgorithm module not available"}), 500
-    
-    data = request.get_json(force=True)
-    use_db = bool(data.get("use_demo_db", True))
+@dataclass
+class SeatingRequest:
+    """Scalar fields of a seating payload, coerced once up front."""
+    rows: int = 10
+    cols: int = 6
+    num_batches: int = 3
+    block_width: int = 2
+    batch_by_column: bool = True
+    enforce_no_adjacent_batches: bool = False
+    use_demo_db: bool = True
+    serial_mode: str = "per_batch"
+    serial_width: int = 0
+
+    @classmethod
+    def from_payload(cls, data):
+        # null means "not given", so the field default applies
+        return cls(**{
+            f.name: _SEATING_COERCE.get(f.type, f.type)(data[f.name])
+            for f in _SEATING_FIELDS
+            if data.get(f.name) is not None
+        })
 
-    if use_db:
-        counts, labels = get_batch_counts_and_labels_from_db()
-        rolls = get_batch_roll_numbers_from_db()
+def parse_bool(value):
+    """JSON bool, number or form-style string ("false", "0", "no", ...) as a bool."""
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ("1", "true", "yes", "on"):
+            return True
+        if text in ("0", "false", "no", "off", ""):
+            return False
+        raise ValueError(f"Invalid boolean: {value!r}")
+    return bool(value)
+
+_SEATING_FIELDS = fields(SeatingRequest)
+# bool("false") is True, so booleans get a real parser
+_SEATING_COERCE = {bool: parse_bool}
+
+def broken_mask_for(data, req):
+    return build_broken_mask(parse_broken_seats(data.get("broken_seats", ""), req.rows, req.cols), req.rows, req.cols)
+
+def build_seating(data):
+    """Run the seating algorithm for a request payload and return the web format."""
+    req = SeatingRequest.from_payload(data)
+
+    if req.use_demo_db:
+        counts, labels, rolls = load_batches_from_db()
         num_batches = len(counts)
     else:
         counts = parse_int_dict(data.get("batch_student_counts"))
         labels = parse_str_dict(data.get("batch_labels"))
         rolls = data.get("batch_roll_numbers") or {}
-        num_batches = int(data.get("num_batches", 3))
-
-    broken_str = data.get("broken_seats", "")
-    broken_seats = []
-    if isinstance(broken_str, str) and "-" in broken_str:
-        broken_seats = [
-            (int(r)-1, int(c)-1) 
-            for r, c in (p.split("-") for p in broken_str.split(",") if "-" in p)
-        ]
-    elif isinstance(broken_str, list):
-        broken_seats = broken_str 
+        num_batches = req.num_batches
 
     algo = SeatingAlgorithm(
-        rows=int(data.get("rows", 10)),
-        cols=int(data.get("cols", 6)),
+        rows=req.rows,
+        cols=req.cols,
         num_batches=num_batches,
-        block_width=int(data.get("block_width", 2)),
-        batch_by_column=bool(data.get("batch_by_column", True)),
-        enforce_no_adjacent_batches=bool(data.get("enforce_no_adjacent_batches", False)),
-        broken_seats=broken_seats,
+        block_width=req.block_width,
+        batch_by_column=req.batch_by_column,
+        enforce_no_adjacent_batches=req.enforce_no_adjacent_batches,
+        broken_mask=broken_mask_for(data, req),
         batch_student_counts=counts,
         batch_roll_numbers=rolls,
         batch_labels=labels,
         start_rolls=parse_str_dict(data.get("start_rolls")),
         batch_colors=parse_str_dict(data.get("batch_colors")),
-        serial_mode=data.get("serial_mode", "per_batch"),
-        serial_width=int(data.get("serial_width", 0))
+        serial_mode=req.serial_mode,
+        serial_width=req.serial_width
     )
 
     algo.generate_seating()
@@ -552,7 +931,55 @@ def generate_seating():
     
     ok, errors = algo.validate_constraints()
     web["validation"] = {"is_valid": ok, "errors": errors}
-    return jsonify(web)
+    return web
+
+def build_constraints_status(data):
+    req = SeatingRequest.from_payload(data)
+    algo = SeatingAlgorithm(
+        rows=req.rows,
+        cols=req.cols,
+        num_batches=req.num_batches,
+        block_width=req.block_width,
+        batch_by_column=req.batch_by_column,
+        enforce_no_adjacent_batches=req.enforce_no_adjacent_batches,
+        broken_mask=broken_mask_for(data, req)
+    )
+    algo.generate_seating()
+    return algo.get_constraints_status()
+
+# The algorithm is deterministic, so identical payloads (the UI's tweak-and-retry
+# loop) are answered from encoded results. Demo-DB runs also depend on the
+# students table, so the students mark is mixed into their key.
+SEATING_CACHE_SIZE = 128
+_seating_cache = OrderedDict()
+_seating_cache_lock = threading.Lock()
+
+def cached_seating_response(kind, data, compute):
+    nonce = students_mark() if kind == "seating" and data.get("use_demo_db", True) else ""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    key = hashlib.blake2b(f"{kind}|{nonce}|{payload}".encode('utf-8'), digest_size=16).digest()
+    
+    with _seating_cache_lock:
+        body = _seating_cache.get(key)
+        if body is not None:
+            _seating_cache.move_to_end(key)
+    if body is None:
+        body = _json_bytes(compute(data))
+        with _seating_cache_lock:
+            _seating_cache[key] = body
+            while len(_seating_cache) > SEATING_CACHE_SIZE:
+                _seating_cache.popitem(last=False)
+    return Response(body, mimetype="application/json")
+
+@app.route("/api/generate-seating", methods=["POST"])
+def generate_seating():
+    if SeatingAlgorithm is None:
+        return jsonify({"error": "SeatingAlgorithm module not available"}), 500
+    
+    data = request.get_json(force=True)
+    if wants_async():
+        return submit_job("seating", build_seating, data)
+    return cached_seating_response("seating", data, build_seating)
 
 @app.route("/api/constraints-status", methods=["POST"])
 def constraints_status():
@@ -560,16 +987,7 @@ def constraints_status():
         return jsonify({"error": "Algorithm module not available"}), 500
     
     data = request.get_json(force=True)
-    algo = SeatingAlgorithm(
-        rows=int(data.get("rows", 10)),
-        cols=int(data.get("cols", 6)),
-        num_batches=int(data.get("num_batches", 3)),
-        block_width=int(data.get("block_width", 2)),
-        batch_by_column=bool(data.get("batch_by_column", True)),
-        enforce_no_adjacent_batches=bool(data.get("enforce_no_adjacent_batches", False))
-    )
-    algo.generate_seating()
-    return jsonify(algo.get_constraints_status())
+    return cached_seating_response("constraints", data, build_constraints_status)
 
 # ============================================================================
 # PDF GENERATION
@@ -584,6 +1002,19 @@ def template_editor():
     # If the TemplateEditor is a React component, this route should also use render_template('index.html')
     # and let React Router handle the /template-editor path.
 
+def send_pdf(path, download_name):
+    """Send a generated PDF from disk with ETag/Last-Modified and Range support."""
+    # File names are content digests, so a cached copy never goes stale
+    return send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True,
+        etag=True,
+        max_age=3600
+    )
+
 @app.route('/api/template-config', methods=['GET', 'POST'])
 def manage_template():
     user_id = 'test_user'
@@ -632,13 +1063,12 @@ def generate_pdf():
         user_id = 'test_user'
         template_name = request.args.get('template_name', 'default')
         
+        if wants_async():
+            return submit_job("pdf", get_or_create_seating_pdf, data, user_id=user_id, template_name=template_name)
+        
         pdf_path = get_or_create_seating_pdf(data, user_id=user_id, template_name=template_name)
         
-        return send_file(
-            pdf_path,
-            as_attachment=True,
-            download_name=f"seating_plan_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        )
+        return send_pdf(pdf_path, f"seating_plan_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -663,26 +1093,69 @@ def test_pdf():
         'metadata': {'rows': 2, 'cols': 3, 'blocks': 1, 'block_width': 3}
     }
     
+    if create_seating_pdf is None:
+        return jsonify({"error": "PDF module not available"}), 500
+    
     try:
-        pdf_path = get_or_create_seating_pdf(sample_data, user_id=user_id, template_name=template_name)
-        return send_file(
-            pdf_path,
-            as_attachment=True,
-            download_name=f"test_seating_plan.pdf"
-        )
+        # A throwaway sample: render it in memory rather than into the
+        # generated-PDF cache directory
+        buf = io.BytesIO()
+        create_seating_pdf(filename=buf, data=sample_data, user_id=user_id, template_name=template_name)
+        buf.seek(0)
+        return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name="test_seating_plan.pdf")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# --------------------------------------------------
+# Background Jobs
+# --------------------------------------------------
+# generate-seating and generate-pdf run inline by default. With ?async=1 they
+# are handed to this pool and answer 202 with a job id to poll instead.
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+MAX_JOBS = 256
+JOBS = {}
+_jobs_lock = threading.Lock()
+
+def wants_async():
+    return request.args.get("async", "").lower() in ("1", "true", "yes")
+
+def submit_job(kind, fn, *args, **kwargs):
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        # Forget the oldest finished jobs once the registry is full
+        if len(JOBS) >= MAX_JOBS:
+            done = [jid for jid, (_, fut) in JOBS.items() if fut.done()]
+            for jid in done[:len(JOBS) - MAX_JOBS + 1]:
+                del JOBS[jid]
+        JOBS[job_id] = (kind, JOB_EXECUTOR.submit(fn, *args, **kwargs))
+    return jsonify({"job_id": job_id, "status": "pending", "status_url": f"/api/jobs/{job_id}"}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a background job; finished PDF jobs return the file itself."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    kind, fut = job
+    if not fut.done():
+        return jsonify({"job_id": job_id, "status": "pending"})
+    
+    exc = fut.exception()
+    if exc is not None:
+        return jsonify({"job_id": job_id, "status": "error", "error": str(exc)}), 500
+    
+    if kind == "pdf":
+        return send_pdf(fut.result(), f"seating_plan_{job_id}.pdf")
+    return jsonify({"job_id": job_id, "status": "done", "result": fut.result()})
+
 # ============================================================================
 # ATTENDANCE GENERATION
 # ============================================================================
 @app.route('/api/allocations', methods=['GET'])
 def get_all_allocations():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT DISTINCT batch_id, batch_name, created_at FROM uploads")
-    rows = cur.fetchall()
-    conn.close()
+    conn = get_db()
+    rows = conn.execute("SELECT DISTINCT batch_id, batch_name, created_at FROM uploads").fetchall()
     return jsonify([{"id": r[0], "batch_name": r[1], "date": r[2]} for r in rows])
 
 @app.route('/api/generate-attendance', methods=['POST'])
@@ -713,19 +1186,17 @@ def get_attendance():
 @token_required
 def reset_data():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        
-        cur.execute("DELETE FROM students")
-        cur.execute("DELETE FROM uploads")
-        cur.execute("DELETE FROM allocations")
-        
-        cur.execute("DELETE FROM sqlite_sequence WHERE name='students'")
-        cur.execute("DELETE FROM sqlite_sequence WHERE name='uploads'")
-        cur.execute("DELETE FROM sqlite_sequence WHERE name='allocations'")
-        
-        conn.commit()
-        conn.close()
+        # One transaction; with no WHERE clause and no triggers SQLite's
+        # truncate optimisation drops each table's pages wholesale
+        conn = get_db()
+        conn.executescript("""
+            BEGIN IMMEDIATE;
+            DELETE FROM students;
+            DELETE FROM uploads;
+            DELETE FROM allocations;
+            DELETE FROM sqlite_sequence WHERE name IN ('students', 'uploads', 'allocations');
+            COMMIT;
+        """)
         
         return jsonify({
             "success": True, 
@@ -735,6 +1206,11 @@ def reset_data():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.errorhandler(RequestEntityTooLarge)
+def file_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({"success": False, "error": f"File too large (limit {limit_mb} MB)"}), 413
+
 # --------------------------------------------------
 # Health Check
 # --------------------------------------------------
@@ -1,12 +1,29 @@
 import sqlite3
 import os
+import hmac
+import json
+import time
+import base64
+import binascii
+import hashlib
+import queue
+import atexit
 import secrets
-from datetime import datetime, timedelta, timezone
+import threading
+import functools
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import jwt
 import bcrypt
-from typing import Tuple, Optional, Dict
+from typing import Tuple, Optional, Dict, Iterable, Union
 from dotenv import load_dotenv
 
+# POSIX file locking for one-time schema setup across worker processes
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # For Google OAuth
 try:
     from google.auth.transport import requests
@@ -16,6 +33,16 @@ except ImportError:
     GOOGLE_AUTH_AVAILABLE = False
     print("⚠️  Google auth library not installed. Run: pip install google-auth")
 
+# Faster JSON for token payloads when orjson is available
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    _json_loads = json.loads
+
 # Load environment variables
 load_dotenv()
 
@@ -29,7 +56,13 @@ DB_PATH = os.path.join(BASE_DIR, 'user_auth.db')
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-stable-secret-key-change-in-prod")
 JWT_ALGORITHM = "HS256"
 TOKEN_EXPIRATION_DAYS = 7
+TOKEN_EXPIRATION_SECONDS = TOKEN_EXPIRATION_DAYS * 86400
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "")
+DB_POOL_SIZE = int(os.getenv("AUTH_DB_POOL_SIZE", "8"))
+USER_CACHE_SIZE = 2048
+# bcrypt work factor: the library default of 12; set BCRYPT_COST lower for snappier local dev
+BCRYPT_COST = int(os.getenv("BCRYPT_COST", "12"))
+USER_CACHE_TTL_SECONDS = 60
 
 # ============================================================================
 # ADMIN EMAIL LIST (Add admin emails here)
@@ -40,121 +73,313 @@ ADMIN_EMAILS = [
     "admin@example.com",      # ← Add other admin emails
 ]
 
+# ============================================================================
+# CONNECTION POOL
+# ============================================================================
+# Connections are opened once and reused across requests instead of paying
+# connect/close (and the .db/-wal/-shm file opens) on every auth call.
+_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=DB_POOL_SIZE)
+_pool_lock = threading.Lock()
+_pool_ready = False
+
+def _open_connection() -> sqlite3.Connection:
+    """Open a connection and apply the per-connection PRAGMAs."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
+def _init_pool():
+    """Fill the pool with pre-opened connections (idempotent)."""
+    global _pool_ready
+    with _pool_lock:
+        if _pool_ready:
+            return
+        for _ in range(DB_POOL_SIZE):
+            _pool.put(_open_connection())
+        _pool_ready = True
+
+@contextmanager
+def get_conn(row_factory=None):
+    """
+    Borrow a pooled connection; it is returned to the pool, not closed.
+    Rows are plain tuples unless a row_factory (e.g. sqlite3.Row) is requested.
+    """
+    if not _pool_ready:
+        _init_pool()
+    conn = _pool.get()
+    conn.row_factory = row_factory
+    try:
+        yield conn
+    finally:
+        # Never hand an open transaction to the next borrower
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put(conn)
+
+def close_pool():
+    """Close every pooled connection (shutdown hook)."""
+    global _pool_ready
+    with _pool_lock:
+        while True:
+            try:
+                conn = _pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+        _pool_ready = False
+
+atexit.register(close_pool)
+
+# ============================================================================
+# SQL STATEMENTS
+# ============================================================================
+# Passing the same SQL text on every call lets each pooled connection's
+# statement cache reuse the prepared statement instead of re-parsing it.
+_SQL_SELECT_USER_BY_EMAIL = "SELECT id, username, email, password_hash, role, full_name, auth_provider FROM users WHERE email = ?"
+_SQL_SELECT_PROFILE_BY_EMAIL = "SELECT id, username, email, role, full_name, auth_provider FROM users WHERE email = ?"
+_SQL_SELECT_USER_BY_GOOGLE_ID = "SELECT id, username, email, role, full_name FROM users WHERE google_id = ?"
+_SQL_SELECT_USER_BY_ID = "SELECT id, username, email, role, full_name FROM users WHERE id = ?"
+_SQL_INSERT_USER = "INSERT INTO users (username, email, password_hash, role, auth_provider) VALUES (?, ?, ?, ?, ?)"
+_SQL_INSERT_USER_IGNORE = "INSERT OR IGNORE INTO users (username, email, password_hash, role, auth_provider) VALUES (?, ?, ?, ?, ?)"
+_SQL_UPDATE_PROFILE = "UPDATE users SET username = COALESCE(?, username), email = COALESCE(?, email), updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+_SQL_INSERT_GOOGLE_USER = "INSERT INTO users (username, email, full_name, auth_provider, google_id, role) VALUES (?, ?, ?, ?, ?, ?)"
+
+_db_initialized = False
+
+@contextmanager
+def _init_lock():
+    """Serialize schema setup across worker processes (no-op without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    with open(DB_PATH + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 def init_user_database():
-    """Initializes the SQLite database and creates the users table."""
+    """Initializes the SQLite database and creates the users table (once per process)."""
+    global _db_initialized
+    if _db_initialized:
+        return
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with _init_lock(), get_conn() as conn, conn:
+            cursor = conn.cursor()
         
-        # Create main users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT,
-                role TEXT NOT NULL DEFAULT 'STUDENT',
-                full_name TEXT,
-                auth_provider TEXT DEFAULT 'local',
-                google_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+            # Create main users table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT NOT NULL,
+                    email TEXT UNIQUE NOT NULL,
+                    password_hash TEXT,
+                    role TEXT NOT NULL DEFAULT 'STUDENT',
+                    full_name TEXT,
+                    auth_provider TEXT DEFAULT 'local',
+                    google_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
         
-        # ========== SAFE DATABASE MIGRATIONS ==========
-        try:
-            cursor.execute("SELECT full_name FROM users LIMIT 1")
-        except sqlite3.OperationalError:
-            print("⚠️  Adding 'full_name' column...")
-            cursor.execute("ALTER TABLE users ADD COLUMN full_name TEXT")
+            # ========== SAFE DATABASE MIGRATIONS ==========
+            try:
+                cursor.execute("SELECT full_name FROM users LIMIT 1")
+            except sqlite3.OperationalError:
+                print("⚠️  Adding 'full_name' column...")
+                cursor.execute("ALTER TABLE users ADD COLUMN full_name TEXT")
         
-        try:
-            cursor.execute("SELECT auth_provider FROM users LIMIT 1")
-        except sqlite3.OperationalError:
-            print("⚠️  Adding 'auth_provider' column...")
-            cursor.execute("ALTER TABLE users ADD COLUMN auth_provider TEXT DEFAULT 'local'")
+            try:
+                cursor.execute("SELECT auth_provider FROM users LIMIT 1")
+            except sqlite3.OperationalError:
+                print("⚠️  Adding 'auth_provider' column...")
+                cursor.execute("ALTER TABLE users ADD COLUMN auth_provider TEXT DEFAULT 'local'")
         
-        try:
-            cursor.execute("SELECT google_id FROM users LIMIT 1")
-        except sqlite3.OperationalError:
-            print("⚠️  Adding 'google_id' column...")
-            cursor.execute("ALTER TABLE users ADD COLUMN google_id TEXT")
+            try:
+                cursor.execute("SELECT google_id FROM users LIMIT 1")
+            except sqlite3.OperationalError:
+                print("⚠️  Adding 'google_id' column...")
+                cursor.execute("ALTER TABLE users ADD COLUMN google_id TEXT")
         
-        try:
-            cursor.execute("SELECT updated_at FROM users LIMIT 1")
-        except sqlite3.OperationalError:
-            print("⚠️  Adding 'updated_at' column...")
-            cursor.execute("ALTER TABLE users ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+            try:
+                cursor.execute("SELECT updated_at FROM users LIMIT 1")
+            except sqlite3.OperationalError:
+                print("⚠️  Adding 'updated_at' column...")
+                cursor.execute("ALTER TABLE users ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
         
-        # ========== CREATE UNIQUE INDEX FOR GOOGLE_ID ==========
-        try:
-            cursor.execute("""
-                CREATE UNIQUE INDEX IF NOT EXISTS idx_google_id 
-                ON users(google_id) 
-                WHERE google_id IS NOT NULL
-            """)
-        except sqlite3.OperationalError:
-            pass
+            # ========== CREATE UNIQUE INDEX FOR GOOGLE_ID ==========
+            try:
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_google_id 
+                    ON users(google_id) 
+                    WHERE google_id IS NOT NULL
+                """)
+            except sqlite3.OperationalError:
+                pass
         
-        conn.commit()
-        conn.close()
+        _db_initialized = True
         print(f"✅ Auth Database initialized at: {DB_PATH}")
     except Exception as e:
         print(f"❌ Failed to init Auth Database: {e}")
 
-# Initialize on import
-init_user_database()
+def startup():
+    """App-startup hook: prepare the auth database (call once from the web app)."""
+    init_user_database()
 
 # ============================================================================
 # JWT HANDLERS
 # ============================================================================
 
+# HS256 tokens are signed directly with hmac/hashlib: the key bytes and the
+# encoded header never change, so there is no per-token setup to repeat.
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+_SIGNING_KEY = JWT_SECRET_KEY.encode('utf-8')
+_HEADER_B64 = _b64url_encode(b'{"alg":"HS256","typ":"JWT"}')
+
+# hmac.digest() takes OpenSSL's one-shot HMAC path (SHA-NI accelerated on
+# builds with asm enabled); warn when sha256 is CPython's builtin fallback.
+if hashlib.sha256.__module__ != '_hashlib':
+    print("⚠️  hashlib.sha256 is not OpenSSL-backed; JWT signing will be slow. "
+          "Use a Python build linked against OpenSSL with asm enabled.")
+
 def create_auth_token(user_id: int, role: str) -> str:
     """Create JWT token for user"""
-    expiration_time = datetime.now(timezone.utc) + timedelta(days=TOKEN_EXPIRATION_DAYS)
+    now = int(time.time())
     payload = {
-        'exp': expiration_time,
-        'iat': datetime.now(timezone.utc),
+        'exp': now + TOKEN_EXPIRATION_SECONDS,
+        'iat': now,
         'sub': str(user_id),
         'user_id': user_id,
         'role': role
     }
-    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    payload_b64 = _b64url_encode(_json_dumps(payload))
+    signing_input = _HEADER_B64 + b"." + payload_b64
+    signature = hmac.digest(_SIGNING_KEY, signing_input, 'sha256')
+    return (signing_input + b"." + _b64url_encode(signature)).decode('ascii')
 
-def verify_token(token: str) -> Optional[Dict]:
-    """Verify JWT token"""
+# Tokens in any other shape go through PyJWT; keep one instance per thread
+# rather than rebuilding the module-level helper's state on every call.
+_jwt_local = threading.local()
+
+def _pyjwt() -> jwt.PyJWT:
+    instance = getattr(_jwt_local, 'instance', None)
+    if instance is None:
+        instance = _jwt_local.instance = jwt.PyJWT()
+    return instance
+
+@functools.lru_cache(maxsize=4096)
+def _decode_token(token: str) -> Optional[Dict]:
+    """Decode and verify a token once; tokens are immutable so the result is memoized."""
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        signing_input, _, signature = token.encode('ascii').rpartition(b".")
+    except UnicodeEncodeError:
+        return None
+    header_b64, _, payload_b64 = signing_input.partition(b".")
+
+    if header_b64 != _HEADER_B64:
+        # Not in the shape create_auth_token emits; let PyJWT handle it
+        try:
+            return _pyjwt().decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+            return None
+
+    expected = hmac.digest(_SIGNING_KEY, signing_input, 'sha256')
+    try:
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        payload = _json_loads(_b64url_decode(payload_b64))
+    except (binascii.Error, ValueError):
+        return None
+
+    if not isinstance(payload, dict):
+        return None
+    if isinstance(payload.get('exp'), (int, float)) and 'nbf' not in payload:
         return payload
+    # Other claim sets (no exp, nbf, ...) get PyJWT's full validation
+    try:
+        return _pyjwt().decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
 
+def verify_token(token: str) -> Optional[Dict]:
+    """Verify JWT token"""
+    payload = _decode_token(token)
+    # Cached payloads may outlive their token, so re-check expiry on every hit
+    if not payload:
+        return None
+    # Tokens without an exp claim never expire, as jwt.decode treats them
+    if 'exp' in payload and payload['exp'] <= time.time():
+        return None
+    return dict(payload)
+
+# ============================================================================
+# PASSWORD HASHING
+# ============================================================================
+# bcrypt releases the GIL inside its C extension, so a thread pool sized to the
+# core count lets bulk sign-ups hash in parallel without oversubscribing.
+_bcrypt_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="bcrypt")
+
+def hash_password(password: str) -> bytes:
+    """Hash a plain password with the configured bcrypt cost (stored as a BLOB as-is)"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_COST))
+
+@functools.lru_cache(maxsize=None)
+def _dummy_hash() -> bytes:
+    """Throwaway hash at the configured cost, built on first use"""
+    return bcrypt.hashpw(b"dummy-password", bcrypt.gensalt(rounds=BCRYPT_COST))
+
+def verify_password(password: str, password_hash: Union[bytes, str]) -> bool:
+    """Check a plain password against a stored bcrypt hash"""
+    # Rows written before hashes were stored as bytes hold them as TEXT
+    if isinstance(password_hash, str):
+        password_hash = password_hash.encode('ascii')
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash)
+
 # ============================================================================
 # USER HELPERS
 # ============================================================================
 
-def get_user_by_email(email: str) -> Optional[Dict]:
-    """Get user by email address"""
+def get_user_by_email(email: str, include_password: bool = True) -> Optional[Dict]:
+    """Get user by email address (pass include_password=False to skip loading the hash)"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, username, email, password_hash, role, full_name, auth_provider FROM users WHERE email = ?", 
-            (email,)
-        )
-        user_data = cursor.fetchone()
-        conn.close()
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            if include_password:
+                cursor.execute(_SQL_SELECT_USER_BY_EMAIL, (email,))
+            else:
+                cursor.execute(_SQL_SELECT_PROFILE_BY_EMAIL, (email,))
+            user_data = cursor.fetchone()
         
         if user_data:
+            if not include_password:
+                uid, username, email, role, full_name, auth_provider = user_data
+                return {
+                    "id": uid,
+                    "username": username,
+                    "email": email,
+                    "role": role,
+                    "full_name": full_name,
+                    "auth_provider": auth_provider,
+                }
+            uid, username, email, password_hash, role, full_name, auth_provider = user_data
             return {
-                "id": user_data[0],
-                "username": user_data[1],
-                "email": user_data[2],
-                "password_hash": user_data[3],
-                "role": user_data[4],
-                "full_name": user_data[5],
-                "auth_provider": user_data[6],
+                "id": uid,
+                "username": username,
+                "email": email,
+                "password_hash": password_hash,
+                "role": role,
+                "full_name": full_name,
+                "auth_provider": auth_provider,
             }
     except Exception as e:
         print(f"Auth DB Error: {e}")
@@ -163,55 +388,74 @@ def get_user_by_email(email: str) -> Optional[Dict]:
 def get_user_by_google_id(google_id: str) -> Optional[Dict]:
     """Get user by Google ID"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, username, email, role, full_name FROM users WHERE google_id = ?", 
-            (google_id,)
-        )
-        user_data = cursor.fetchone()
-        conn.close()
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_SELECT_USER_BY_GOOGLE_ID, (google_id,))
+            user_data = cursor.fetchone()
         
         if user_data:
+            uid, username, email, role, full_name = user_data
             return {
-                "id": user_data[0],
-                "username": user_data[1],
-                "email": user_data[2],
-                "role": user_data[3],
-                "fullName": user_data[4],
+                "id": uid,
+                "username": username,
+                "email": email,
+                "role": role,
+                "fullName": full_name,
             }
     except Exception as e:
         print(f"Auth DB Error: {e}")
     return None
 
+# Short-lived cache of user rows keyed by id: {user_id: (expires_at, user)}
+_user_cache: Dict[int, Tuple[float, Dict]] = {}
+_user_cache_lock = threading.Lock()
+
+def _load_user(user_id: int) -> Optional[Dict]:
+    """Fetch the public user row by id, served from a short TTL cache on bursts."""
+    now = time.time()
+    with _user_cache_lock:
+        hit = _user_cache.get(user_id)
+    if hit and hit[0] > now:
+        return dict(hit[1])
+
+    try:
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_SELECT_USER_BY_ID, (user_id,))
+            user_data = cursor.fetchone()
+    except Exception as e:
+        print(f"Auth DB Error: {e}")
+        return None
+
+    if not user_data:
+        return None
+    uid, username, email, role, full_name = user_data
+    user = {
+        "id": uid,
+        "username": username,
+        "email": email,
+        "role": role,
+        "fullName": full_name,
+    }
+    with _user_cache_lock:
+        if len(_user_cache) >= USER_CACHE_SIZE:
+            # Dicts keep insertion order, so this drops the oldest entry
+            _user_cache.pop(next(iter(_user_cache)))
+        _user_cache[user_id] = (now + USER_CACHE_TTL_SECONDS, user)
+    return dict(user)
+
+def _invalidate_user(user_id: int):
+    """Drop a cached user row after it has been modified."""
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
 def get_user_by_token(token: str) -> Optional[Dict]:
     """Get user info from JWT token"""
     payload = verify_token(token)
     if not payload: 
         return None
     
-    user_id = payload.get('user_id')
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, username, email, role, full_name FROM users WHERE id = ?",
-            (user_id,)
-        )
-        user_data = cursor.fetchone()
-        conn.close()
-        
-        if user_data:
-            return {
-                "id": user_data[0],
-                "username": user_data[1],
-                "email": user_data[2],
-                "role": user_data[3],
-                "fullName": user_data[4],
-            }
-    except Exception as e:
-        print(f"Auth DB Error: {e}")
-    return None
+    return _load_user(payload.get('user_id'))
 
 # ============================================================================
 # AUTH FUNCTIONS
@@ -222,35 +466,56 @@ def signup(username: str, email: str, password: str, role: str) -> Tuple[bool, s
     if not username or not email or not password:
         return False, "All fields are required."
     
-    if get_user_by_email(email):
-        return False, "User with this email already exists."
-    
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = hash_password(password)
     
+    # The UNIQUE constraint on email does the duplicate check in the same statement
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (username, email, password_hash, role, auth_provider) VALUES (?, ?, ?, ?, ?)",
-            (username, email, password_hash, role.upper(), 'local')
-        )
-        conn.commit()
-        conn.close()
+        with get_conn() as conn, conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                _SQL_INSERT_USER,
+                (username, email, password_hash, role.upper(), 'local')
+            )
         return True, "User registered successfully."
+    except sqlite3.IntegrityError:
+        return False, "User with this email already exists."
     except sqlite3.Error as e:
         return False, f"Database error: {str(e)}"
 
+def signup_many(rows: Iterable[Tuple[str, str, str, str]]) -> Tuple[int, int]:
+    """
+    Bulk sign-up for import scripts.
+    rows: iterable of (username, email, password, role).
+    Returns (inserted, skipped); incomplete rows and existing emails are skipped.
+    """
+    rows = list(rows)
+    valid = [r for r in rows if r[0] and r[1] and r[2]]
+    # bcrypt releases the GIL, so the hashing fans out across cores
+    hashes = _bcrypt_executor.map(hash_password, [r[2] for r in valid])
+    params = [
+        (username, email, password_hash, role.upper(), 'local')
+        for (username, email, _, role), password_hash in zip(valid, hashes)
+    ]
+    
+    with get_conn() as conn, conn:
+        before = conn.total_changes
+        conn.executemany(_SQL_INSERT_USER_IGNORE, params)
+        inserted = conn.total_changes - before
+    return inserted, len(rows) - inserted
+
 def login(email: str, password: str) -> Tuple[bool, Optional[Dict], str]:
     """Login user with email/password"""
     user = get_user_by_email(email)
     if not user:
+        # Spend one bcrypt check anyway so unknown emails cost (and time) the same
+        verify_password(password or "", _dummy_hash())
         return False, None, "Invalid email or password."
     
     # Check password
     if not user.get('password_hash'):
         return False, None, "User registered via Google. Use Google sign-in."
     
-    if bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+    if verify_password(password, user['password_hash']):
         token = create_auth_token(user['id'], user['role'])
         user_data = {
             "id": user['id'],
@@ -265,30 +530,17 @@ def login(email: str, password: str) -> Tuple[bool, Optional[Dict], str]:
 
 def update_user_profile(user_id: int, username: str = None, email: str = None) -> Tuple[bool, str]:
     """Update user profile (username and email only)"""
-    updates = []
-    params = []
-    
-    if username:
-        updates.append("username = ?")
-        params.append(username)
-    if email:
-        updates.append("email = ?")
-        params.append(email)
-        
-    if not updates: 
+    # Empty values mean "leave unchanged"; COALESCE keeps the current column
+    username = username or None
+    email = email or None
+    if username is None and email is None: 
         return False, "No data provided."
     
-    # Add updated_at timestamp
-    updates.append("updated_at = CURRENT_TIMESTAMP")
-    query = f"UPDATE users SET {', '.join(updates)} WHERE id = ?"
-    params.append(user_id)
-    
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(query, tuple(params))
-        conn.commit()
-        conn.close()
+        with get_conn() as conn, conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_UPDATE_PROFILE, (username, email, user_id))
+        _invalidate_user(user_id)
         return True, "Profile updated successfully."
     except sqlite3.Error as e:
         return False, f"Update failed: {str(e)}"
@@ -330,7 +582,7 @@ def google_auth_handler(token: str) -> Tuple[bool, Optional[Dict], str]:
             user_role = 'STUDENT'
         
         # Check if user exists by email
-        existing_user = get_user_by_email(email)
+        existing_user = get_user_by_email(email, include_password=False)
         
         if existing_user:
             # User already exists
@@ -339,30 +591,28 @@ def google_auth_handler(token: str) -> Tuple[bool, Optional[Dict], str]:
             
             # Update google_id if not set, and update role if needed
             try:
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                
-                updates = []
-                params = []
-                
-                if not existing_user.get('google_id'):
-                    updates.append("google_id = ?")
-                    params.append(google_id)
-                
-                # Update role if user was STUDENT and is now in ADMIN list
-                if existing_user.get('role') == 'STUDENT' and user_role == 'ADMIN':
-                    updates.append("role = ?")
-                    params.append('ADMIN')
-                    print(f"📝 Updated {email} to ADMIN role")
-                
-                if updates:
-                    updates.append("auth_provider = 'google'")
-                    query = f"UPDATE users SET {', '.join(updates)} WHERE id = ?"
-                    params.append(user_id)
-                    cursor.execute(query, tuple(params))
-                    conn.commit()
-                
-                conn.close()
+                with get_conn() as conn, conn:
+                    cursor = conn.cursor()
+                    
+                    updates = []
+                    params = []
+                    
+                    if not existing_user.get('google_id'):
+                        updates.append("google_id = ?")
+                        params.append(google_id)
+                    
+                    # Update role if user was STUDENT and is now in ADMIN list
+                    if existing_user.get('role') == 'STUDENT' and user_role == 'ADMIN':
+                        updates.append("role = ?")
+                        params.append('ADMIN')
+                        print(f"📝 Updated {email} to ADMIN role")
+                    
+                    if updates:
+                        updates.append("auth_provider = 'google'")
+                        query = f"UPDATE users SET {', '.join(updates)} WHERE id = ?"
+                        params.append(user_id)
+                        cursor.execute(query, tuple(params))
+                _invalidate_user(user_id)
             except Exception as e:
                 print(f"Warning: Could not update user: {e}")
             
@@ -373,17 +623,13 @@ def google_auth_handler(token: str) -> Tuple[bool, Optional[Dict], str]:
             username = email.split('@')[0]  # Use email prefix as username
             
             try:
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(
-                    """INSERT INTO users 
-                       (username, email, full_name, auth_provider, google_id, role) 
-                       VALUES (?, ?, ?, ?, ?, ?)""",
-                    (username, email, full_name, 'google', google_id, user_role)
-                )
-                conn.commit()
-                user_id = cursor.lastrowid
-                conn.close()
+                with get_conn() as conn, conn:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        _SQL_INSERT_GOOGLE_USER,
+                        (username, email, full_name, 'google', google_id, user_role)
+                    )
+                    user_id = cursor.lastrowid
                 
                 role_text = "ADMIN 👑" if user_role == 'ADMIN' else "STUDENT"
                 print(f"✅ New user created: {email} ({role_text})")
@@ -4,12 +4,21 @@ from datetime import datetime
 
 DATABASE_PATH = "pdf_gen/pdf_templates.db"
 
+def connect(path=DATABASE_PATH):
+    """Open a connection with the per-connection write PRAGMAs applied"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
 def init_database():
     """Initialize SQLite database with user templates"""
     # Ensure the directory exists
     os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
     
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect()
+    # journal_mode is persistent in the DB file, so setting it once is enough
+    conn.execute("PRAGMA journal_mode=WAL")
     cursor = conn.cursor()
     
     # Create user_templates table
@@ -44,7 +53,7 @@ def init_database():
 
 def get_db_connection():
     """Get database connection with Row factory"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect()
     conn.row_factory = sqlite3.Row
     return conn
 
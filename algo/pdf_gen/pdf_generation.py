@@ -2,6 +2,8 @@
 import json
 import os
 import hashlib
+from functools import lru_cache
+from itertools import groupby
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
@@ -22,6 +24,21 @@ except ImportError:
 CACHE_DIR = "pdf_gen/seat_plan_generated"
 IMAGE_PATH = "pdf_gen/data/banner.png"
 CUSTOM_PAGE_SIZE = (304 * mm, 235 * mm)
+BLOCK_HEADER_BG = colors.HexColor("#E0E0E0")
+
+# Paragraph styles never change between documents, so build them once
+_STYLES = getSampleStyleSheet()
+CELL_STYLE = _STYLES['Normal'].clone('Cell', fontSize=9, alignment=1, leading=12, fontName='Helvetica-Bold')
+HEADER_STYLE = _STYLES['Normal'].clone('Header', fontSize=12, alignment=1, fontName='Helvetica-Bold')
+DEPT_STYLE = _STYLES['Normal'].clone('Dept', fontSize=13, alignment=1)
+EXAM_STYLE = _STYLES['Normal'].clone('Exam', fontSize=12, alignment=1)
+TITLE_STYLE = _STYLES['Heading4'].clone('Title', alignment=1, fontSize=18)
+BR_STYLE = _STYLES['Normal'].clone('BR', fontSize=12, fontName='Helvetica-Bold')
+
+@lru_cache(maxsize=64)
+def hex_color(value: str):
+    """Parse a hex colour once; seats in the same batch share a handful of colours."""
+    return colors.HexColor(value)
 
 def seating_payload_digest(data: dict, user_id: str = 'system', template_name: str = 'default') -> str:
     """Create hash including user template configuration"""
@@ -176,44 +193,18 @@ def create_seating_pdf(filename="algo/pdf_gen/seat_plan_generated/seating_plan.p
         rightMargin=1.5 * cm
     )
     story = []
-    styles = getSampleStyleSheet()
-
-    cell_style = styles['Normal'].clone('Cell')
-    cell_style.fontSize = 9
-    cell_style.alignment = 1
-    cell_style.leading = 12
-    cell_style.fontName = 'Helvetica-Bold'
-
-    header_style = styles['Normal'].clone('Header')
-    header_style.fontSize = 12
-    header_style.alignment = 1
-    header_style.fontName = 'Helvetica-Bold'
-
     story.append(Spacer(0, 0.2 * cm))
     
     # Use template values
-    dept_style = styles['Normal'].clone('Dept')
-    dept_style.fontSize = 13
-    dept_style.alignment = 1
-    story.append(Paragraph(f"<b>{template_config.get('dept_name')}</b>", dept_style))
+    story.append(Paragraph(f"<b>{template_config.get('dept_name')}</b>", DEPT_STYLE))
     
     story.append(Spacer(0, 0.15 * cm))
-    exam_style = styles['Normal'].clone('Exam')
-    exam_style.fontSize = 12
-    exam_style.alignment = 1
-    story.append(Paragraph(template_config.get('exam_details'), exam_style))
+    story.append(Paragraph(template_config.get('exam_details'), EXAM_STYLE))
     
-    title_style = styles['Heading4'].clone('Title')
-    title_style.alignment = 1
-    title_style.fontSize = 18
-    story.append(Paragraph(f"<b>{template_config.get('seating_plan_title')}</b>", title_style))
+    story.append(Paragraph(f"<b>{template_config.get('seating_plan_title')}</b>", TITLE_STYLE))
 
-    br_style = styles['Normal'].clone('BR')
-    br_style.fontSize = 12
-    br_style.fontName = 'Helvetica-Bold'
-    
-    branch = Paragraph(f"<b>{template_config.get('branch_text')}</b>", br_style)
-    room = Paragraph(f"<b>{template_config.get('room_number')}</b>", br_style)
+    branch = Paragraph(f"<b>{template_config.get('branch_text')}</b>", BR_STYLE)
+    room = Paragraph(f"<b>{template_config.get('room_number')}</b>", BR_STYLE)
     
     page_width = CUSTOM_PAGE_SIZE[0]
     content_width = page_width - doc.leftMargin - doc.rightMargin
@@ -248,7 +239,7 @@ def create_seating_pdf(filename="algo/pdf_gen/seat_plan_generated/seating_plan.p
             start_col = col_index
             end_col = min(col_index + block_width, num_cols)
             if start_col < num_cols:
-                block_header_row[start_col] = Paragraph(f"<b>Block {block_idx + 1}</b>", header_style)
+                block_header_row[start_col] = Paragraph(f"<b>Block {block_idx + 1}</b>", HEADER_STYLE)
             col_index = end_col
 
         table_content.append(block_header_row)
@@ -259,11 +250,11 @@ def create_seating_pdf(filename="algo/pdf_gen/seat_plan_generated/seating_plan.p
             end_col = min(col_index + block_width, num_cols) - 1
             if start_col <= end_col:
                 style_cmds.append(('SPAN', (start_col, 0), (end_col, 0)))
-                style_cmds.append(('BACKGROUND', (start_col, 0), (end_col, 0), colors.HexColor("#E0E0E0")))
+                style_cmds.append(('BACKGROUND', (start_col, 0), (end_col, 0), BLOCK_HEADER_BG))
             col_index = end_col + 1
 
         for row in seating_matrix:
-            table_content.append([format_cell_content(cell['text'], cell_style) for cell in row])
+            table_content.append([format_cell_content(cell['text'], CELL_STYLE) for cell in row])
 
         col_width = content_width / num_cols + 6
         table = Table(table_content, colWidths=[col_width] * num_cols)
@@ -280,11 +271,15 @@ def create_seating_pdf(filename="algo/pdf_gen/seat_plan_generated/seating_plan.p
             ('BOTTOMPADDING', (0, 1), (-1, -1), 7),
         ])
 
+        # One BACKGROUND command per run of same-coloured cells in a row;
+        # batch-by-column layouts repeat colours, so this cuts the style list
         for r_idx, row in enumerate(seating_matrix, start=1):
-            for c_idx, cell in enumerate(row):
-                bg = cell.get('bg')
+            c_idx = 0
+            for bg, run in groupby(row, key=lambda cell: cell.get('bg')):
+                run_len = sum(1 for _ in run)
                 if bg:
-                    style_cmds.append(('BACKGROUND', (c_idx, r_idx), (c_idx, r_idx), colors.HexColor(bg)))
+                    style_cmds.append(('BACKGROUND', (c_idx, r_idx), (c_idx + run_len - 1, r_idx), hex_color(bg)))
+                c_idx += run_len
 
         table.setStyle(TableStyle(style_cmds))
         story.append(table)
@@ -3,7 +3,7 @@ import hashlib
 import os
 import sqlite3
 from datetime import datetime
-from .database import DATABASE_PATH
+from .database import DATABASE_PATH, connect
 
 # Simple secure_filename fallback
 def secure_filename(filename):
@@ -30,7 +30,7 @@ class TemplateManager:
     def get_db_connection(self):
         # Ensure directory exists to prevent connection errors
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
+        conn = connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
     
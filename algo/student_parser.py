@@ -16,36 +16,246 @@ Features:
 from __future__ import annotations
 
 import io
+import codecs
 import uuid
 import re
+import string
 import json
 import logging
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Tuple, Union, Optional
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger("student_parser")
 logger.setLevel(logging.INFO)
 
+# Optional: pyarrow's multithreaded CSV reader is several times faster than
+# the C engine on large rosters
+try:
+    import pyarrow  # noqa: F401
+
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+# Optional: orjson serialises large batches several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: the Rust calamine reader parses workbooks several times faster
+# than openpyxl and yields the same strings under dtype=str
+try:
+    import python_calamine  # noqa: F401
+
+    _HAS_CALAMINE = True
+except ImportError:
+    _HAS_CALAMINE = False
+
+# Optional: pick a non-UTF-8 CSV's encoding from a sample instead of
+# re-parsing the whole file once per guess
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    from_bytes = None
+
+ENCODING_SNIFF_BYTES = 65536
+
+
+# Column dtype for everything we read. pandas 3's str dtype is already
+# Arrow-backed when pyarrow is installed; on pandas 2 ask for it explicitly so
+# strings live in one Arrow buffer instead of one PyObject per cell
+_STR_DTYPE: Any = str
+if _HAS_PYARROW and int(pd.__version__.split(".")[0]) < 3:
+    _STR_DTYPE = pd.StringDtype(storage="pyarrow")
+
+
+def _read_csv(source: Any, **kwargs: Any) -> pd.DataFrame:
+    """pd.read_csv as strings without NA conversion, via pyarrow when available."""
+    if _HAS_PYARROW:
+        pos = source.tell() if hasattr(source, "seek") else None
+        try:
+            return pd.read_csv(
+                source,
+                dtype=_STR_DTYPE,
+                keep_default_na=False,
+                engine="pyarrow",
+                **kwargs,
+            )
+        except Exception:
+            # Anything pyarrow rejects gets a second chance with the C engine
+            if pos is not None:
+                source.seek(pos)
+    # Everything is read as str, so low_memory's per-chunk type inference
+    # is wasted work; paths can also be mmapped instead of read in
+    return pd.read_csv(
+        source,
+        dtype=_STR_DTYPE,
+        keep_default_na=False,
+        engine="c",
+        low_memory=False,
+        memory_map=isinstance(source, str),
+        **kwargs,
+    )
+
+
+def _candidate_encodings(sample: bytes, fallbacks: Tuple[str, ...]) -> List[str]:
+    """Encodings to try in order: the sniffed one first, then the fallbacks."""
+    try:
+        # Incremental decode tolerates a multi-byte char cut off by the sample
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        sniffed = "utf-8"
+    except UnicodeDecodeError:
+        best = from_bytes(sample).best() if from_bytes is not None else None
+        sniffed = best.encoding if best is not None else None
+    if sniffed is None:
+        return list(fallbacks)
+    return [sniffed] + [enc for enc in fallbacks if enc != sniffed]
+
+
+def _read_excel(source: Any) -> pd.DataFrame:
+    """pd.read_excel as strings without NA conversion, via calamine when available."""
+    if _HAS_CALAMINE:
+        pos = source.tell() if hasattr(source, "seek") else None
+        try:
+            return pd.read_excel(
+                source, dtype=_STR_DTYPE, keep_default_na=False, engine="calamine"
+            )
+        except Exception:
+            if pos is not None:
+                source.seek(pos)
+    return pd.read_excel(source, dtype=_STR_DTYPE, keep_default_na=False)
+
+
+_WS_RE = re.compile(r"\s+")
+_NORM_COL_RE = re.compile(r"[^0-9a-z]")
+
 
 def _norm_col_name(x: Any) -> str:
     """Normalize column header: lowercase, no spaces/punct, alnum only."""
-    if x is None:
+    if type(x) is str:
+        s = x.strip().lower()
+    elif x is None:
         return ""
-    s = str(x).strip().lower()
-    s = re.sub(r"[^0-9a-z]", "", s)
+    else:
+        s = str(x).strip().lower()
+    # Already-clean headers skip the regex engine
+    if not (s.isascii() and s.isalnum()):
+        s = _NORM_COL_RE.sub("", s)
     return s
 
 
-def _normalize_enrollment_value(v: Any) -> str:
-    """Normalize an enrollment value: strip, remove internal whitespace."""
-    if v is None:
-        return ""
-    s = str(v).strip()
-    s = re.sub(r"\s+", "", s)
-    return s
+DEFAULT_ENROLLMENT_REGEX = r"^[A-Za-z0-9\-\_/]+$"
+# Compiled once and shared by every parser using the default (patterns are immutable)
+_DEFAULT_ENROLLMENT_RE = re.compile(DEFAULT_ENROLLMENT_REGEX)
+# Translation table deleting every character DEFAULT_ENROLLMENT_REGEX allows,
+# plus the newline used to join a column into one string
+_ENROLL_ALLOWED_DELETE = str.maketrans("", "", string.ascii_letters + string.digits + "-_/\n")
+
+
+def _all_default_enrollments(values: List[str]) -> bool:
+    """
+    True if every value matches DEFAULT_ENROLLMENT_REGEX. Normalized values
+    hold no whitespace, so the whole column is checked as one joined string.
+    """
+    if "" in values:
+        return False
+    joined = "\n".join(values)
+    return joined.isascii() and not joined.translate(_ENROLL_ALLOWED_DELETE)
+
+
+_ENROLL_KEYS = (
+    "enrollment",
+    "enrollmentno",
+    "enroll",
+    "enrollno",
+    "enrollmentnumber",
+    "roll",
+    "rollno",
+    "regno",
+    "registrationno",
+    "studentid",
+    "id",
+    "matricno",
+)
+_NAME_KEYS = ("name", "studentname", "fullname", "candidate", "firstname", "fname")
+
+# Exact matches win by key priority; otherwise the first column containing any
+# key wins. One rank lookup and one alternation regex per column.
+_ENROLL_RANK = {k: i for i, k in enumerate(_ENROLL_KEYS)}
+_NAME_RANK = {k: i for i, k in enumerate(_NAME_KEYS)}
+_ENROLL_SUB_RE = re.compile("|".join(map(re.escape, _ENROLL_KEYS)))
+_NAME_SUB_RE = re.compile("|".join(map(re.escape, _NAME_KEYS)))
+
+
+def _pick_column(
+    norm_map: Dict[str, str], rank: Dict[str, int], sub_re: re.Pattern
+) -> Optional[str]:
+    exact = [(rank[norm], orig) for norm, orig in norm_map.items() if norm in rank]
+    if exact:
+        return min(exact)[1]
+    for norm, orig in norm_map.items():
+        if sub_re.search(norm):
+            return orig
+    return None
+
+
+def _enrollment_warnings(
+    col: pd.Series, empty: np.ndarray, invalid: np.ndarray
+) -> List[Dict]:
+    """Row warnings for the flagged positions only, in row order."""
+    raw = col.to_numpy()
+    warnings: List[Dict] = []
+    for pos in np.flatnonzero(empty | invalid).tolist():
+        if empty[pos]:
+            warnings.append({"row": pos + 1, "issue": "empty_enrollment", "value": None})
+        else:
+            # invalid rows are still included, normalized
+            warnings.append(
+                {"row": pos + 1, "issue": "invalid_enrollment_format", "value": raw[pos]}
+            )
+    return warnings
+
+
+JSON_WRITE_CHUNK = 4096
+
+
+def _orjson_indented(obj: Any, depth: int) -> bytes:
+    """orjson's 2-space output for obj, shifted to sit at the given nesting depth."""
+    out = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    # JSON strings never contain raw newlines, so this only touches layout
+    return out.replace(b"\n", b"\n" + b"  " * depth)
+
+
+def _write_payload_orjson(f: Any, payload: Dict[str, Any]) -> None:
+    """
+    Write payload like json.dumps(indent=2) would, encoding each batch's
+    list JSON_WRITE_CHUNK items at a time so peak memory stays one chunk.
+    """
+    data = payload["data"]
+    head = {k: v for k, v in payload.items() if k != "data"}
+    # Reopen the metadata object to append "data" as its last key
+    f.write(_orjson_indented(head, 0)[:-2])
+    if not data:
+        f.write(b',\n  "data": {}\n}')
+        return
+    f.write(b',\n  "data": {')
+    for i, (key, items) in enumerate(data.items()):
+        f.write((b",\n    " if i else b"\n    ") + orjson.dumps(str(key)) + b": ")
+        if not isinstance(items, list) or not items:
+            f.write(_orjson_indented(items, 2))
+            continue
+        f.write(b"[")
+        for start in range(0, len(items), JSON_WRITE_CHUNK):
+            chunk = _orjson_indented(items[start:start + JSON_WRITE_CHUNK], 2)
+            # Drop the chunk's own brackets so the pieces splice into one list
+            f.write((b"," if start else b"") + chunk[1:-6])
+        f.write(b"\n    ]")
+    f.write(b"\n  }\n}")
 
 
 @dataclass
@@ -64,155 +274,153 @@ class ParseResult:
 class StudentDataParser:
     def __init__(
         self,
-        enrollment_regex: str = r"^[A-Za-z0-9\-\_/]+$",
+        enrollment_regex: str = DEFAULT_ENROLLMENT_REGEX,
         supported_formats: Optional[List[str]] = None,
     ) -> None:
-        self.enrollment_pattern = re.compile(enrollment_regex)
+        self.enrollment_pattern = (
+            _DEFAULT_ENROLLMENT_RE
+            if enrollment_regex == DEFAULT_ENROLLMENT_REGEX
+            else re.compile(enrollment_regex)
+        )
         self.supported_formats = supported_formats or [".csv", ".xlsx", ".xls"]
         self.last_parse_result: Optional[ParseResult] = None
+        self._readers = {
+            str: self._read_path,
+            bytes: self._read_bytes,
+            bytearray: self._read_bytes,
+        }
 
     # ----------------------------------------------------------------------
     # File reading with CSV/XLSX detection
     # ----------------------------------------------------------------------
     def read_file(self, file_input: Union[str, bytes, io.BytesIO, Any]) -> pd.DataFrame:
         """
-        Read a CSV/XLSX into a pandas DataFrame (dtype=str, keep_default_na=False).
+        Read a CSV/XLSX into a pandas DataFrame (string columns, keep_default_na=False).
 
         Supports:
         - Path string
         - bytes
         - file-like (has .read())
         """
-        # Path string case
+        reader = self._readers.get(type(file_input))
+        if reader is not None:
+            return reader(file_input)
+        # Subclasses of the exact types above miss the table
         if isinstance(file_input, str):
-            p = Path(file_input)
-            suffix = p.suffix.lower()
-            if suffix not in self.supported_formats:
-                raise ValueError(f"Unsupported file extension: {suffix}")
-
-            if suffix == ".csv":
-                # Try several encodings
-                for enc in ("utf-8", "latin-1", "iso-8859-1"):
-                    try:
-                        return pd.read_csv(
-                            file_input, dtype=str, keep_default_na=False, encoding=enc
-                        )
-                    except Exception:
-                        continue
-                raise ValueError("Failed to read CSV with common encodings")
-            else:
-                # Excel
-                return pd.read_excel(file_input, dtype=str, keep_default_na=False)
-
-        # Bytes case
+            return self._read_path(file_input)
         if isinstance(file_input, (bytes, bytearray)):
-            head = bytes(file_input[:4]) if len(file_input) >= 4 else b""
-            # XLSX = zip = PK\x03\x04
-            if head.startswith(b"PK\x03\x04"):
-                try:
-                    return pd.read_excel(
-                        io.BytesIO(file_input), dtype=str, keep_default_na=False
-                    )
-                except Exception as e:
-                    raise ValueError("Failed to read XLSX from bytes: " + str(e))
-            # Old XLS = D0 CF 11 E0 (compound file)
-            if head.startswith(b"\xD0\xCF\x11\xE0"):
-                try:
-                    return pd.read_excel(
-                        io.BytesIO(file_input), dtype=str, keep_default_na=False
-                    )
-                except Exception as e:
-                    raise ValueError("Failed to read XLS from bytes: " + str(e))
-            # Fallback: treat as CSV
-            for enc in ("utf-8", "latin-1"):
+            return self._read_bytes(file_input)
+        if hasattr(file_input, "read"):
+            return self._read_stream(file_input)
+        raise ValueError("Unsupported input type for read_file")
+
+    def _read_path(self, path: str) -> pd.DataFrame:
+        """Read a .csv/.xlsx/.xls file from disk."""
+        p = Path(path)
+        suffix = p.suffix.lower()
+        if suffix not in self.supported_formats:
+            raise ValueError(f"Unsupported file extension: {suffix}")
+
+        if suffix == ".csv":
+            with open(path, "rb") as fh:
+                sample = fh.read(ENCODING_SNIFF_BYTES)
+            for enc in _candidate_encodings(sample, ("utf-8", "latin-1", "iso-8859-1")):
                 try:
-                    text = file_input.decode(enc)
-                    return pd.read_csv(
-                        io.StringIO(text), dtype=str, keep_default_na=False
-                    )
+                    return _read_csv(path, encoding=enc)
                 except Exception:
                     continue
-            raise ValueError("Unable to parse bytes as CSV or Excel")
-
-        # File-like (e.g., Flask FileStorage, UploadFile.stream)
-        if hasattr(file_input, "read"):
-            # peek a bit for magic bytes
+            raise ValueError("Failed to read CSV with common encodings")
+        else:
+            # Excel
+            return _read_excel(path)
+
+    def _read_bytes(self, data: Union[bytes, bytearray]) -> pd.DataFrame:
+        """Read an in-memory upload, sniffing Excel magic bytes before CSV."""
+        # One BytesIO shared by every reader below; over a bytes object it
+        # borrows the buffer instead of copying it
+        buf = io.BytesIO(data)
+        mv = memoryview(data)
+        head = mv[:4].tobytes()
+        # XLSX = zip = PK\x03\x04
+        if head.startswith(b"PK\x03\x04"):
             try:
-                pos = file_input.tell()
-            except Exception:
-                pos = None
-
-            head = file_input.read(8)
+                return _read_excel(buf)
+            except Exception as e:
+                raise ValueError("Failed to read XLSX from bytes: " + str(e))
+        # Old XLS = D0 CF 11 E0 (compound file)
+        if head.startswith(b"\xD0\xCF\x11\xE0"):
             try:
-                if pos is not None:
-                    file_input.seek(pos)
-                else:
-                    file_input.seek(0)
+                return _read_excel(buf)
+            except Exception as e:
+                raise ValueError("Failed to read XLS from bytes: " + str(e))
+        # Fallback: treat as CSV. pandas decodes the buffer itself rather
+        # than us building a decoded str and a StringIO copy of it
+        sample = mv[:ENCODING_SNIFF_BYTES].tobytes()
+        for enc in _candidate_encodings(sample, ("utf-8", "latin-1")):
+            try:
+                buf.seek(0)
+                return _read_csv(buf, encoding=enc)
             except Exception:
-                pass
-
-            # head as bytes?
-            if isinstance(head, (bytes, bytearray)):
-                if head.startswith(b"PK\x03\x04") or head.startswith(
-                    b"\xD0\xCF\x11\xE0"
-                ):
-                    # Excel
-                    try:
-                        content = file_input.read()
-                        if not isinstance(content, (bytes, bytearray)):
-                            content = str(content).encode("utf-8")
-                        return pd.read_excel(
-                            io.BytesIO(content), dtype=str, keep_default_na=False
-                        )
-                    except Exception as e:
-                        try:
-                            file_input.seek(0)
-                        except Exception:
-                            pass
-                        raise ValueError("Failed to read Excel upload: " + str(e))
-
-                # Not clearly Excel; try CSV
-                content = file_input.read()
+                continue
+        raise ValueError("Unable to parse bytes as CSV or Excel")
+
+    def _read_stream(self, stream: Any) -> pd.DataFrame:
+        """Read a file-like object (Flask FileStorage, UploadFile.stream, ...)."""
+        # peek a bit for magic bytes
+        try:
+            pos = stream.tell()
+        except Exception:
+            pos = None
+
+        head = stream.read(8)
+        try:
+            if pos is not None:
+                stream.seek(pos)
+            else:
+                stream.seek(0)
+        except Exception:
+            pass
+
+        # head as bytes?
+        if isinstance(head, (bytes, bytearray)):
+            if head.startswith(b"PK\x03\x04") or head.startswith(
+                b"\xD0\xCF\x11\xE0"
+            ):
+                # Excel: the stream is seekable (we just rewound it), so
+                # openpyxl/xlrd can read it directly without a full copy
                 try:
-                    file_input.seek(0)
-                except Exception:
-                    pass
-                if isinstance(content, (bytes, bytearray)):
-                    for enc in ("utf-8", "latin-1"):
-                        try:
-                            text = content.decode(enc)
-                            return pd.read_csv(
-                                io.StringIO(text),
-                                dtype=str,
-                                keep_default_na=False,
-                            )
-                        except Exception:
-                            continue
-                else:
-                    return pd.read_csv(
-                        io.StringIO(str(content)), dtype=str, keep_default_na=False
-                    )
-
-                # fallback excel
+                    return _read_excel(stream)
+                except Exception as e:
+                    try:
+                        stream.seek(0)
+                    except Exception:
+                        pass
+                    raise ValueError("Failed to read Excel upload: " + str(e))
+
+            # Not clearly Excel; try CSV. pandas decodes the byte stream
+            # itself, so no bytes -> str -> StringIO copies are made
+            sample = stream.read(ENCODING_SNIFF_BYTES)
+            for enc in _candidate_encodings(sample, ("utf-8", "latin-1")):
                 try:
-                    file_input.seek(0)
+                    stream.seek(0 if pos is None else pos)
+                    return _read_csv(stream, encoding=enc)
                 except Exception:
-                    pass
-                return pd.read_excel(file_input, dtype=str, keep_default_na=False)
+                    continue
 
-            # head is text
-            content = file_input.read()
+            # fallback excel
             try:
-                file_input.seek(0)
+                stream.seek(0)
             except Exception:
                 pass
-            return pd.read_csv(
-                io.StringIO(str(head) + str(content)),
-                dtype=str,
-                keep_default_na=False,
-            )
+            return _read_excel(stream)
 
-        raise ValueError("Unsupported input type for read_file")
+        # head is text
+        content = stream.read()
+        try:
+            stream.seek(0)
+        except Exception:
+            pass
+        return _read_csv(io.StringIO(str(head) + str(content)))
 
     # ----------------------------------------------------------------------
     # Column detection
@@ -222,55 +430,37 @@ class StudentDataParser:
         Auto-detect likely 'name' and 'enrollment' columns.
         Returns: {'name': original_col_or_None, 'enrollment': original_col_or_None}
         """
-        detected = {"name": None, "enrollment": None}
         norm_map: Dict[str, str] = {}
         for c in df.columns:
             norm_map[_norm_col_name(c)] = c
-
-        enroll_keys = [
-            "enrollment",
-            "enrollmentno",
-            "enroll",
-            "enrollno",
-            "enrollmentnumber",
-            "roll",
-            "rollno",
-            "regno",
-            "registrationno",
-            "studentid",
-            "id",
-            "matricno",
-        ]
-        name_keys = ["name", "studentname", "fullname", "candidate", "firstname", "fname"]
-
-        # exact normalized key
-        for key in enroll_keys:
-            if key in norm_map:
-                detected["enrollment"] = norm_map[key]
-                break
-        for key in name_keys:
-            if key in norm_map:
-                detected["name"] = norm_map[key]
-                break
-
-        # fallback: substring
-        if detected["enrollment"] is None:
-            for norm, orig in norm_map.items():
-                if any(k in norm for k in enroll_keys):
-                    detected["enrollment"] = orig
-                    break
-
-        if detected["name"] is None:
-            for norm, orig in norm_map.items():
-                if any(k in norm for k in name_keys):
-                    detected["name"] = orig
-                    break
-
-        return detected
+        return {
+            "name": _pick_column(norm_map, _NAME_RANK, _NAME_SUB_RE),
+            "enrollment": _pick_column(norm_map, _ENROLL_RANK, _ENROLL_SUB_RE),
+        }
 
     # ----------------------------------------------------------------------
     # Extraction
     # ----------------------------------------------------------------------
+    def _normalize_enrollments(
+        self, col: pd.Series
+    ) -> Tuple[pd.Series, np.ndarray, np.ndarray]:
+        """
+        Normalize enrollments (every whitespace run removed) and check their
+        format over a whole column.
+        Returns (normalized, empty_mask, invalid_mask); masks are positional.
+        """
+        empty = (col.isna() | col.eq("")).to_numpy()
+        # Removing every whitespace run also covers the leading/trailing strip
+        norm = col.where(~empty, "").astype(str).str.replace(_WS_RE, "", regex=True)
+        if self.enrollment_pattern.pattern == DEFAULT_ENROLLMENT_REGEX and (
+            _all_default_enrollments(norm[~empty].tolist())
+        ):
+            # Clean column: no per-value regex calls needed
+            invalid = np.zeros(len(norm), dtype=bool)
+        else:
+            invalid = ~norm.str.match(self.enrollment_pattern).to_numpy(dtype=bool) & ~empty
+        return norm, empty, invalid
+
     def extract_mode1(
         self, df: pd.DataFrame, enrollment_col: Optional[str] = None
     ) -> Tuple[List[str], List[Dict]]:
@@ -288,22 +478,9 @@ class StudentDataParser:
                 f"Enrollment column not found. Available columns: {df.columns.tolist()}"
             )
 
-        enrollments: List[str] = []
-        for idx, value in enumerate(df[enrollment_col].tolist(), start=1):
-            if value is None or value == "" or (isinstance(value, float) and pd.isna(value)):
-                warnings.append({"row": idx, "issue": "empty_enrollment", "value": None})
-                continue
-            norm = _normalize_enrollment_value(value)
-            if not self.enrollment_pattern.match(norm):
-                warnings.append(
-                    {
-                        "row": idx,
-                        "issue": "invalid_enrollment_format",
-                        "value": value,
-                    }
-                )
-                # still include normalized
-            enrollments.append(norm)
+        norm, empty, invalid = self._normalize_enrollments(df[enrollment_col])
+        warnings.extend(_enrollment_warnings(df[enrollment_col], empty, invalid))
+        enrollments: List[str] = norm[~empty].tolist()
         return enrollments, warnings
 
     def extract_mode2(
@@ -337,26 +514,19 @@ class StudentDataParser:
             )
             name_col = None
 
-        students: List[Dict[str, str]] = []
-        for idx, row in enumerate(df.to_dict(orient="records"), start=1):
-            raw_en = row.get(enrollment_col)
-            if raw_en is None or raw_en == "":
-                warnings.append({"row": idx, "issue": "empty_enrollment", "value": None})
-                continue
-            enroll_norm = _normalize_enrollment_value(raw_en)
-            if not self.enrollment_pattern.match(enroll_norm):
-                warnings.append(
-                    {
-                        "row": idx,
-                        "issue": "invalid_enrollment_format",
-                        "value": raw_en,
-                    }
-                )
-            name_val = ""
-            if name_col:
-                nv = row.get(name_col)
-                name_val = "" if nv is None else str(nv).strip()
-            students.append({"name": name_val, "enrollmentNo": enroll_norm})
+        norm, empty, invalid = self._normalize_enrollments(df[enrollment_col])
+        warnings.extend(_enrollment_warnings(df[enrollment_col], empty, invalid))
+
+        # Two aligned column lists instead of one dict per row from to_dict()
+        keep = ~empty
+        enrollments = norm[keep].tolist()
+        if name_col:
+            names = df[name_col][keep].fillna("").astype(str).str.strip().tolist()
+        else:
+            names = [""] * len(enrollments)
+        students: List[Dict[str, str]] = [
+            {"name": n, "enrollmentNo": e} for n, e in zip(names, enrollments)
+        ]
         return students, warnings
 
     # ----------------------------------------------------------------------
@@ -417,9 +587,15 @@ class StudentDataParser:
     ) -> Dict[str, Any]:
         df = self.read_file(file_input)
         detected = self.detect_columns(df)
-        sample = df.head(max_rows).fillna("").to_dict(orient="records")
+        cols = df.columns.tolist()
+        # Short CSV rows can still yield NaN; blank those per cell rather than
+        # copying the head through fillna()
+        sample = [
+            {c: ("" if pd.isna(v) else v) for c, v in zip(cols, row)}
+            for row in df.head(max_rows).itertuples(index=False, name=None)
+        ]
         return {
-            "columns": list(map(str, df.columns.tolist())),
+            "columns": list(map(str, cols)),
             "detectedColumns": detected,
             "sampleData": sample,
             "totalRows": len(df),
@@ -428,27 +604,40 @@ class StudentDataParser:
     # ----------------------------------------------------------------------
     # JSON helpers
     # ----------------------------------------------------------------------
-    def to_json_str(self, parse_result: Optional[ParseResult] = None) -> str:
+    def _json_payload(self, parse_result: Optional[ParseResult]) -> Dict[str, Any]:
         if parse_result is None:
             parse_result = self.last_parse_result
         if parse_result is None:
             raise ValueError("No parse result available")
-        return json.dumps(
-            {
-                "batch_id": parse_result.batch_id,
-                "batch_name": parse_result.batch_name,
-                "mode": parse_result.mode,
-                "source": parse_result.source_filename,
-                "rows_total": parse_result.rows_total,
-                "rows_extracted": parse_result.rows_extracted,
-                "warnings": parse_result.warnings,
-                "errors": parse_result.errors,
-                "data": parse_result.data,
-            },
-            ensure_ascii=False,
-            indent=2,
-        )
+        return {
+            "batch_id": parse_result.batch_id,
+            "batch_name": parse_result.batch_name,
+            "mode": parse_result.mode,
+            "source": parse_result.source_filename,
+            "rows_total": parse_result.rows_total,
+            "rows_extracted": parse_result.rows_extracted,
+            "warnings": parse_result.warnings,
+            "errors": parse_result.errors,
+            "data": parse_result.data,
+        }
+
+    def _json_bytes(self, parse_result: Optional[ParseResult]) -> bytes:
+        payload = self._json_payload(parse_result)
+        if orjson is not None:
+            return orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+    def to_json_str(self, parse_result: Optional[ParseResult] = None) -> str:
+        return self._json_bytes(parse_result).decode("utf-8")
 
     def to_json_file(self, path: str, parse_result: Optional[ParseResult] = None) -> None:
-        s = self.to_json_str(parse_result)
-        Path(path).write_text(s, encoding="utf-8")
+        """Stream the same document to_json_str() builds, without holding it all."""
+        payload = self._json_payload(parse_result)
+        if orjson is None:
+            encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+            with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+                for chunk in encoder.iterencode(payload):
+                    f.write(chunk)
+            return
+        with open(path, "wb", buffering=1 << 20) as f:
+            _write_payload_orjson(f, payload)
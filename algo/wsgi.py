@@ -0,0 +1,4 @@
+"""WSGI entry point for production servers (gunicorn / waitress)."""
+from app import app
+
+application = app